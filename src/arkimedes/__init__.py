@@ -1,36 +1,173 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from pathlib import Path
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 CONCAT_STRING = "\n---\n"
+FETCH_WORKERS = 16
+READ_WORKERS = 8
+CHUNK_SIZE = 65536
+
+# Set by enable_http_cache(); used when the shared session is built.
+_CACHED_SESSION = None
+
+
+@lru_cache(maxsize=1)
+def get_session():
+    """Return the ``requests.Session`` shared by all arkimedes HTTP calls.
+
+    The session keeps connections alive in a pool, so repeated calls to
+    EZID or to source hosts reuse them instead of handshaking each time.
+
+    Returns
+    -------
+    requests.Session
+    """
+    if _CACHED_SESSION is None:
+        session = requests.Session()
+    else:
+        session = _CACHED_SESSION()
+
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        # Also retry rate limiting and the gateway errors EZID returns
+        # while it is busy, honouring any Retry-After header.
+        # Retry() only replays idempotent methods, so POSTs are never
+        # re-sent, and the last response is returned rather than raised.
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=(429, 502, 503, 504),
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+def enable_http_cache(cache_name="arkimedes-http-cache", expire_after=3600):
+    """Cache GET responses made through the shared session on disk.
+
+    Repeated fetches of the same source file or LC NAF search, within
+    a run or across runs, are answered from a SQLite cache instead of
+    the network. Nothing from EZID is cached: ARK records must reflect
+    the latest updates, and batch downloads are streamed straight to
+    disk. Process pool workers read the cache but don't add to it; see
+    ``init_worker_session()``. Requires the optional ``requests-cache``
+    package.
+
+    Parameters
+    ----------
+    cache_name : str or pathlib.Path
+        Path of the SQLite cache file. Defaults to
+        "arkimedes-http-cache".
+    expire_after : int
+        Seconds to keep cached responses. Defaults to 3600.
+
+    Returns
+    -------
+    None
+    """
+    global _CACHED_SESSION
+    import requests_cache
+
+    _CACHED_SESSION = partial(
+        requests_cache.CachedSession,
+        cache_name,
+        backend="sqlite",
+        expire_after=expire_after,
+        urls_expire_after={"ezid.cdlib.org": requests_cache.DO_NOT_CACHE},
+    )
+    close_session()
+
+
+def close_session():
+    """Close the shared session and release its pooled connections.
+
+    The next call to ``get_session()`` builds a fresh session.
+
+    Returns
+    -------
+    None
+    """
+    # Only close a session that has actually been built.
+    if get_session.cache_info().currsize:
+        get_session().close()
+    get_session.cache_clear()
+
+
+def init_worker_session():
+    """Set up the shared session in a new worker process.
+
+    Used as a process pool ``initializer``. The session inherited from
+    the parent is dropped, and when the HTTP cache is enabled the
+    worker's session only reads from it: SQLite doesn't share a
+    connection across a fork, and several processes writing to the one
+    cache file would fail with "database is locked".
+
+    Returns
+    -------
+    None
+    """
+    global _CACHED_SESSION
+
+    if _CACHED_SESSION is not None:
+        _CACHED_SESSION = partial(_CACHED_SESSION, read_only=True)
+    close_session()
 
 
 def get_from_files(fs, encoding="utf-8"):
-    files = []
-    for f in fs:
-        with open(f, "r", encoding=encoding) as fh:
-            content = fh.read()
-        files.append(content)
+    def read(f):
+        # Without an encoding, return raw bytes like get_from_urls().
+        if encoding is None:
+            return Path(f).read_bytes()
+
+        return Path(f).read_text(encoding=encoding)
+
+    # A pool isn't worth starting for one or two files.
+    if len(fs) <= 2:
+        return [read(f) for f in fs]
+
+    with ThreadPoolExecutor(max_workers=min(READ_WORKERS, len(fs))) as executor:
+        return list(executor.map(read, fs))
 
-    return files
+
+def _fetch_one(url):
+    try:
+        request = get_session().get(url, timeout=30)
+        if request.ok:
+            return request.content
+    except requests.RequestException:
+        print(f"Item not found: {url}")
+
+    return None
 
 
 def get_from_urls(urls):
-    files = []
-    for url in urls:
-        try:
-            request = requests.get(url)
-            if request.ok:
-                files.append(request.content)
-        except:
-            print(f"Item not found: {url}")
+    if not urls:
+        return []
+
+    # Fetches are network-bound, so overlap them on pooled connections.
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(urls))) as executor:
+        files = [f for f in executor.map(_fetch_one, urls) if f is not None]
 
     return files
 
 
 def get_sources(sources):
-    fs = [s for s in sources if not s.startswith("http")]
-    urls = [s for s in sources if s.startswith("http")]
+    fs = []
+    urls = []
+    for s in sources:
+        (urls if s.startswith(("http://", "https://")) else fs).append(s)
 
-    files = get_from_files(fs)
+    # Sources are EAD XML or PDFs, which their parsers read as bytes.
+    files = get_from_files(fs, encoding=None)
     files.extend(get_from_urls(urls))
 
     return files
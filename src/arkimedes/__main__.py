@@ -15,66 +15,250 @@ password to be provided.
 
 """
 import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from itertools import chain
+import logging
+import sys
+from threading import Lock
 
-from arkimedes import get_sources
-from arkimedes.ead import generate_anvl_from_ead_xml
+import requests
+
+from arkimedes import enable_http_cache, get_sources
 from arkimedes.ezid import (
     anvl_to_dict,
     batch_download,
     find_reusable,
     find_url,
     get_value_from_anvl_string,
+    iter_anvl_records,
     load_anvl_as_str,
     load_anvl_as_str_from_tsv,
     upload_anvl,
     view_anvl,
 )
-from arkimedes.pdf import generate_anvl_from_conservation_reports
+
+
+UPLOAD_WORKERS = 8
+
+# Under the package logger even when run as ``python -m arkimedes``.
+logger = logging.getLogger("arkimedes")
+
+_KNOWN_URLS_LOCK = Lock()
 
 
 class MissingArgumentError(Exception):
     pass
 
 
-def submit_md(args, anvl, reusables=(x for x in [])):
+class _LockedIterator:
+    """Make an iterator safe to share between upload threads."""
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self._lock = Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._lock:
+            return next(self._iterator)
+
+
+def _lazy_reusables(username, password):
+    # The EZID search only runs once a record first asks for a reusable ARK.
+    yield from find_reusable(username, password)
+
+
+def _claim_url(url, known_urls):
+    """Add url to known_urls, returning False if it was already there."""
+    with _KNOWN_URLS_LOCK:
+        if url in known_urls:
+            return False
+        known_urls.add(url)
+        return True
+
+
+def submit_md(args, anvl, reusables=(x for x in []), known_urls=None):
+    # A failed EZID search or lookup is reported with its record, and
+    # the rest of the batch carries on.
+    try:
+        _submit_md(args, anvl, reusables, known_urls)
+    except requests.RequestException as e:
+        logger.error("Could not submit record: %s\n%s", e, anvl)
+
+
+def _submit_md(args, anvl, reusables, known_urls):
     if args.action == "update":
         upload(args, anvl, "update")
     else:
         url = get_value_from_anvl_string("_target", anvl)
 
+        # Within a batch, a repeated target has already been checked
+        # against EZID, so skip the search instead of repeating it.
+        # Records without a target have nothing to compare.
+        if (
+            url is not None
+            and known_urls is not None
+            and not _claim_url(url, known_urls)
+        ):
+            logger.info(
+                "%s has already been submitted in this batch.\nNo new ARK minted.",
+                url,
+            )
+            return
+
         try:
             found = next(find_url(url, args.username, args.password))
         except StopIteration:
             found = None
 
         if found is not None:
-            print(f"An ARK has already been minted for {url}.\n")
-            view_anvl(args.username, args.password, found["ark"])
-            print("No new ARK minted.")
+            # Report as one message so concurrent submissions can't
+            # interleave their output.
+            record = view_anvl(args.username, args.password, found["ark"], False)
+            logger.info(
+                "An ARK has already been minted for %s.\n\n%s\nNo new ARK minted.",
+                url,
+                record,
+            )
         else:
             if args.reuse:
                 try:
                     reusable = next(reusables)
-                    args.target = reusable["ark"]
-                    upload(args, anvl, "update")
+                    upload(args, anvl, "update", reusable["ark"])
                 except StopIteration:
                     upload(args, anvl, "mint")
             else:
                 upload(args, anvl, "mint")
 
 
-def upload(args, anvl, action):
+def submit_all(args, anvls, reusables=(x for x in [])):
+    """Submit ANVL records to EZID concurrently.
+
+    EZID calls are latency-bound, so records are handed to a pool of
+    ``UPLOAD_WORKERS`` threads rather than submitted one at a time.
+    Only a few records are read ahead of the uploads, so lazily
+    generated records are never all held in memory at once.
+    """
+    reusables = _LockedIterator(reusables)
+    known_urls = set()
+    pending = set()
+
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        for anvl in anvls:
+            if len(pending) >= UPLOAD_WORKERS * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+
+            pending.add(
+                executor.submit(submit_md, args, anvl, reusables, known_urls)
+            )
+
+        for future in pending:
+            future.result()
+
+
+def upload(args, anvl, action, target=None):
+    if target is None:
+        target = args.target
+
     ark = upload_anvl(
-        args.username, args.password, args.target, anvl, action, args.out
+        args.username, args.password, target, anvl, action, args.out
     )
     return ark
 
 
-def main():
+def _handle_batch_download(args, reusables):
+    batch_download(
+        args.username,
+        args.password,
+        args.batch_format,
+        args.batch_compression,
+        args.batch_args,
+        decompress=args.batch_decompress,
+    )
+
+
+def _handle_delete(args, reusables):
+    pass
+
+
+def _iter_anvl_sources(sources):
+    # Support multiple ANVL strings or files in args.source
+    for anvl in sources:
+        # Check if input is an ANVL string or file
+        if "\n" in anvl:
+            # Support multiple records in a single ANVL string
+            yield from iter_anvl_records(anvl)
+        else:
+            # Support multiple records in a single ANVL file
+            yield from load_anvl_as_str(anvl)
+
+
+def _handle_mint_anvl(args, reusables):
+    submit_all(args, _iter_anvl_sources(args.source), reusables)
+
+
+def _handle_mint_conservation_report(args, reusables):
+    from arkimedes.pdf import generate_anvl_from_conservation_reports
+
+    pdfs = get_sources(args.source)
+    pdf_data = zip(pdfs, args.source)
+
+    anvls = generate_anvl_from_conservation_reports(pdf_data)
+
+    submit_all(args, anvls, reusables)
+
+
+def _handle_mint_ead(args, reusables):
+    # lxml and the LC NAF checks are only needed here.
+    from arkimedes.ead import generate_anvl_from_ead_xml
+
+    ead_xml = get_sources(args.source)
+
+    anvls = generate_anvl_from_ead_xml(ead_xml)
+
+    submit_all(args, anvls, reusables)
+
+
+def _handle_mint_tsv(args, reusables):
+    anvls = chain.from_iterable(map(load_anvl_as_str_from_tsv, args.source))
+
+    submit_all(args, anvls, reusables)
+
+
+def _handle_update(args, reusables):
+    for anvl in args.source:
+        submit_md(args, anvl)
+
+
+def _handle_view(args, reusables):
+    view_anvl(args.username, args.password, args.target)
+
+
+ACTIONS = {
+    "batch-download": _handle_batch_download,
+    "delete": _handle_delete,
+    "mint-anvl": _handle_mint_anvl,
+    "mint-conservation-report": _handle_mint_conservation_report,
+    "mint-ead": _handle_mint_ead,
+    "mint-tsv": _handle_mint_tsv,
+    "update": _handle_update,
+    "view": _handle_view,
+}
+
+
+@lru_cache(maxsize=1)
+def get_args():
+    """Parse the command-line arguments once and cache the result."""
     parser = argparse.ArgumentParser()
 
     parser.add_argument(
         "action",
+        choices=list(ACTIONS),
         help="""Action to take. Accepted arguments are: 'batch-download', 'delete',
 'mint-anvl', 'mint-ead', 'mint-conservation-report', 'mint-tsv', 'update', and
 'view'. 'mint-anvl' mints new ARKs from ANVL metadata and 'mint-ead' mints ARKs
@@ -91,6 +275,7 @@ any character or characters; a hyphen is recommended.""",
     parser.add_argument("password", nargs="?", default="", help="EZID password.")
     parser.add_argument(
         "--batch-args",
+        default="",
         help="""Additional arugments to be passed to the EZID API. MUST be in
 '&key=value' format. For a full list of available options, see:
 https://ezid.cdlib.org/doc/apidoc.html#parameters
@@ -104,14 +289,30 @@ please refer to their documentation: https://ezid.cdlib.org/doc/apidoc.html#down
     )
     parser.add_argument(
         "--batch-compression",
+        default="zip",
         help="""File compression to use with batch downloads. Accepted values are
 'gzip' and 'zip' If this argument is not given, the default 'zip' is used.""",
+    )
+    parser.add_argument(
+        "--batch-decompress",
+        action="store_true",
+        help="""Save the unpacked batch download instead of the compressed
+archive. 'gzip' downloads are decompressed as they arrive.""",
     )
     parser.add_argument(
         "--batch-format",
+        default="anvl",
         help="""The file format to be returned when batch downloading ARK records.
 Accepted values are 'anvl', 'csv', and 'xml'. If this argument is not given,
 the default format 'anvl' is used.""",
+    )
+    parser.add_argument(
+        "--cached",
+        action="store_true",
+        help="""Cache GET responses, such as source files and LC name
+lookups, in a local SQLite file for an hour so repeated runs skip the
+network. EZID responses are never cached. Requires the requests-cache
+package.""",
     )
     parser.add_argument(
         "--out", help="Output file for recording EZID API response."
@@ -130,70 +331,30 @@ is available, rather than minting a new ARK. If no reusable record is
 available, a new ARK will be minted.""",
     )
 
-    args = parser.parse_args()
-
-    reuseables = None
-    if args.reuse:
-        reusables = find_reusable(args.username, args.password)
-    else:
-        reusables = (x for x in [])
-
-    if args.action == "mint-anvl":
-        # Support multiple ANVL strings or files in args.source
-        for anvl in args.source:
-            # Check if input is an ANVL string or file
-            if "\n" in anvl:
-                # Support multiple records in a single ANVL string
-                for a in anvl.split("\n\n"):
-                    submit_md(args, a, reusables)
-            else:
-                # Support multiple records in a single ANVL string
-                for a in load_anvl_as_str(anvl):
-                    submit_md(args, a, reusables)
-    elif args.action == "mint-ead":
-        ead_xml = get_sources(args.source)
-
-        anvls = generate_anvl_from_ead_xml(ead_xml)
-
-        for anvl in anvls:
-            submit_md(args, anvl, reuseables)
-    elif args.action == "mint-conservation-report":
-        pdfs = get_sources(args.source)
-        pdf_data = zip(pdfs, args.source)
+    return parser.parse_args()
 
-        anvls = generate_anvl_from_conservation_reports(pdf_data)
 
-        for anvl in anvls:
-            submit_md(args, anvl, reusables)
-    elif args.action == "mint-tsv":
-        for source in args.source:
-            for anvl in load_anvl_as_str_from_tsv(source):
-                submit_md(args, anvl, reusables)
+def main():
+    args = get_args()
 
-    elif args.action == "batch-download":
-        format_ = "anvl"
-        compression = "zip"
+    # EZID responses are logged at INFO; show them as plain lines on
+    # stdout, where printed output went, so minted ARKs can be piped.
+    # Only arkimedes' own loggers are configured, so dependencies stay
+    # at the root logger's WARNING level.
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
 
-        if args.batch_format is not None:
-            format_ = args.batch_format
+    if args.cached:
+        enable_http_cache()
 
-        if args.batch_compression is not None:
-            compression = args.batch_compression
+    if args.reuse:
+        reusables = _lazy_reusables(args.username, args.password)
+    else:
+        reusables = (x for x in [])
 
-        if args.batch_args is not None:
-            batch_download(
-                args.username, args.password, format_, compression, args.batch_args
-            )
-        else:
-            batch_download(args.username, args.password, format_, compression)
-
-    elif args.action == "delete":
-        pass
-    elif args.action == "update":
-        for anvl in args.source:
-            submit_md(args, anvl)
-    elif args.action == "view":
-        view_anvl(args.username, args.password, args.target)
+    ACTIONS[args.action](args, reusables)
 
 
 if __name__ == "__main__":
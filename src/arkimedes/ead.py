@@ -1,42 +1,149 @@
+import atexit
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+import os
 
 from lxml import etree
 
-from arkimedes import CONCAT_STRING
-from arkimedes.ezid import build_anvl, generate_anvl_strings
+from arkimedes import CONCAT_STRING, init_worker_session
+from arkimedes.ezid import build_anvl, generate_anvl_strings, iter_anvl_strings
 from arkimedes.qa import check_lc_naf
 
+# Evaluated relative to the collection-level <did> found while parsing.
+# Elements are matched by local name so both EAD 2002 files with the
+# urn:isbn:1-931666-22-9 namespace and un-namespaced files work.
+_CREATOR_XPATH = etree.XPath(
+    "*[local-name()='origination'][@label='Creator']"
+    "/*[local-name()='persname' or local-name()='corpname']/text()"
+)
+_TITLE_XPATH = etree.XPath("*[local-name()='unittitle']/text()")
+_DATES_XPATH = etree.XPath("string(*[local-name()='unitdate']/@normal)")
+# Parser settings for EAD files: never fetch DTDs or entities over the
+# network, and skip work the XPath lookups don't need. Entities declared
+# in a file's own DTD subset are still expanded so titles keep their
+# text; lxml's default only resolves those internal entities.
+_PARSER_OPTIONS = {
+    "collect_ids": False,
+    "no_network": True,
+    "remove_blank_text": True,
+}
+
+# Opened on the first malformed file and kept open for the rest of the run.
+_malformed_log = None
+
+
+def _log_malformed_xml(xml):
+    global _malformed_log
+
+    if _malformed_log is None:
+        _malformed_log = open("malformed_xml.txt", "ab")
+        atexit.register(_malformed_log.close)
+
+    # The file is already UTF-8 bytes; write it without a decode round-trip.
+    _malformed_log.write(xml + CONCAT_STRING.encode("utf-8"))
+    # Flush per record so nothing is lost if the process exits abruptly.
+    _malformed_log.flush()
+
+
+def _find_ead_fields(xml):
+    """Return the eadid text and the collection-level <did> of an EAD file.
+
+    Only ``eadid`` and ``did`` elements are handed back to Python, and a
+    file whose collection-level <did> is already malformed, such as a
+    title with an undefined entity, fails before the rest is read. The
+    remainder is still parsed so any later markup errors are raised too.
+    """
+    target = None
+    did = None
+    events = etree.iterparse(
+        BytesIO(xml),
+        events=("end",),
+        tag=("{*}eadid", "{*}did"),
+        **_PARSER_OPTIONS,
+    )
+    for _, elem in events:
+        parent = elem.getparent()
+        if parent is None:
+            continue
+
+        parent_name = etree.QName(parent).localname
+        if etree.QName(elem).localname == "eadid":
+            if parent_name == "eadheader":
+                target = elem.text
+        elif parent_name == "archdesc" and did is None:
+            did = elem
+            errors = events.error_log.filter_from_errors()
+            if errors:
+                error = errors[0]
+                raise etree.XMLSyntaxError(
+                    error.message, error.type, error.line, error.column
+                )
+
+    return target, did
+
 
 def _generate_anvl_from_ead_xml(xml):
     try:
-        tree = etree.parse(BytesIO(xml))
+        target, did = _find_ead_fields(xml)
+        if target is None or did is None:
+            raise IndexError("EAD is missing eadheader/eadid or archdesc/did")
+
         try:
-            creator = check_lc_naf(
-                tree.xpath(
-                    "//archdesc/did/origination[@label='Creator']/*[self::persname or self::corpname]/text()"
-                )[0]
-            )
+            creator = check_lc_naf(_CREATOR_XPATH(did)[0])
         except IndexError:
             creator = ""
 
-        title = tree.xpath("//archdesc/did/unittitle/text()")[0]
+        title = _TITLE_XPATH(did)[0]
+        dates = str(_DATES_XPATH(did))
 
-        try:
-            dates = tree.xpath("//archdesc/did/unitdate/@normal")[0]
-        except:
-            dates = ""
+        return build_anvl(creator, title, dates, target)
+    except etree.XMLSyntaxError as e:
+        print(e)
+        _log_malformed_xml(xml)
 
-        target = tree.xpath("//ead/eadheader/eadid/text()")[0]
 
-        return build_anvl(creator, title, dates, target)
-    except etree.XMLSyntaxError:
-        print(etree.XMLSyntaxError)
-        with open("malformed_xml.txt", "a", encoding="utf-8") as fh:
-            fh.write(xml.decode("utf-8"))
-            fh.write(CONCAT_STRING)
+def _iter_anvl_strings_in_processes(xml):
+    # The pool stays open until the caller has consumed every record.
+    # Only a few files are parsed ahead of the caller, in input order,
+    # so finished records don't pile up while uploads catch up.
+    workers = os.cpu_count() or 1
+    pending = deque()
+    # Workers build their own session, reading but never writing the
+    # HTTP cache; see init_worker_session().
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker_session
+    ) as executor:
+        for x in xml:
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+
+            pending.append(executor.submit(_generate_anvl_from_ead_xml, x))
+
+        while pending:
+            yield pending.popleft().result()
 
 
 def generate_anvl_from_ead_xml(xml, output_file=None):
+    xml = list(xml)
+    # Parsing is CPU-bound, but a process pool only pays for its start-up
+    # cost once there are a few finding aids to spread across it.
+    parallel = len(xml) >= 4
+
+    # Without an output file, hand records to the caller as they're
+    # parsed so uploads can start before the whole batch is processed.
+    if output_file is None:
+        if parallel:
+            return _iter_anvl_strings_in_processes(xml)
+
+        return iter_anvl_strings(xml, _generate_anvl_from_ead_xml)
+
+    if parallel:
+        with ProcessPoolExecutor(initializer=init_worker_session) as executor:
+            return generate_anvl_strings(
+                xml, _generate_anvl_from_ead_xml, output_file, executor
+            )
+
     return generate_anvl_strings(xml, _generate_anvl_from_ead_xml, output_file)
 
 
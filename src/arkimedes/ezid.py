@@ -1,10 +1,110 @@
-from inspect import cleandoc
-from itertools import zip_longest
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+import csv
+from functools import lru_cache
+import gzip
+import logging
+import os
+import re
+from shutil import copyfileobj
 import sys
-from time import sleep
+from threading import Lock
+from time import monotonic, sleep
+from urllib.parse import parse_qsl
+import zipfile
 
 from lxml import etree
 import requests
+from requests.auth import AuthBase
+
+from arkimedes import CHUNK_SIZE, get_session
+
+__all__ = [
+    "anvls_to_dict",
+    "anvl_to_dict",
+    "batch_download",
+    "build_anvl",
+    "convert_anvl_file_to_tsv",
+    "find_reusable",
+    "find_url",
+    "generate_anvl_strings",
+    "get_value_from_anvl_string",
+    "get_values_from_anvl_string",
+    "iter_anvl_records",
+    "iter_anvl_strings",
+    "load_anvl_as_dict",
+    "load_anvl_as_dict_from_tsv",
+    "load_anvl_as_str",
+    "load_anvl_as_str_from_tsv",
+    "login",
+    "query",
+    "upload_anvl",
+    "upload_anvls",
+    "view_anvl",
+    "view_anvls",
+]
+
+logger = logging.getLogger(__name__)
+
+# Serializes --out appends when records are uploaded from several threads.
+_OUTPUT_LOCK = Lock()
+# Compiled per-field patterns used by get_value_from_anvl_string().
+_ANVL_FIELD_PATTERNS = {}
+# Title given to ARK records that may be overwritten with new metadata.
+_REUSE_TITLE_PATTERN = re.compile(r"\s*reuse\s*$", re.I)
+_LOGIN_URL = "https://ezid.cdlib.org/login"
+_UPLOAD_HEADERS = {"Content-Type": "text/plain; charset=UTF-8"}
+_HTML_PARSER = etree.HTMLParser(collect_ids=False, remove_comments=True)
+# Result rows of the EZID manage search, and the field each column maps to.
+_QUERY_ROWS_XPATH = etree.XPath("//tr[td[starts-with(@class, 'c_')]]")
+_QUERY_COLUMNS = (
+    ("creator", "c_creator"),
+    ("title", "c_title"),
+    ("ark", "c_identifier"),
+    ("owner", "c_owner"),
+    ("created", "c_create_time"),
+    ("updated", "c_update_time"),
+    ("id_status", "c_id_status"),
+)
+# Blank line(s) between records in a multi-record ANVL string.
+_ANVL_RECORD_SEPARATOR = re.compile(r"(?:\r?\n){2,}")
+# Record layout filled in by build_anvl(): each ANVL field and the
+# build_anvl() argument that supplies its value.
+_ANVL_FIELDS = (
+    ("erc.who", "creator"),
+    ("erc.what", "title"),
+    ("erc.when", "dates"),
+    ("dc.creator", "creator"),
+    ("dc.title", "title"),
+    ("dc.publisher", "publisher"),
+    ("dc.date", "dates"),
+    ("dc.type", "type_"),
+    ("_target", "target"),
+    ("_profile", "profile"),
+)
+_ANVL_TEMPLATE = "\n".join(f"{field}:{{{arg}}}" for field, arg in _ANVL_FIELDS)
+# Plain tab-separated values: every character, quotes included, is kept
+# as written, so a value can't hold a tab or a line break.
+_TSV_FORMAT = {"delimiter": "\t", "quoting": csv.QUOTE_NONE, "quotechar": None}
+_TSV_UNSAFE = str.maketrans("\t\r\n", "   ")
+
+
+class _BasicAuth(AuthBase):
+    """HTTP Basic auth with the header value encoded once, up front."""
+
+    def __init__(self, username, password):
+        credentials = f"{username}:{password}".encode("latin1")
+        self.header = "Basic " + b64encode(credentials).decode("ascii")
+
+    def __call__(self, r):
+        r.headers["Authorization"] = self.header
+        return r
+
+
+@lru_cache(maxsize=4)
+def _basic_auth(username, password):
+    return _BasicAuth(username, password)
+
 
 def anvls_to_dict(anvls):
     """Convert a multi-record ANVL string to a list of dictionaries.
@@ -18,7 +118,7 @@ def anvls_to_dict(anvls):
     --------
     list[dict]
     """
-    return [anvl_to_dict(a) for a in anvls.split("\n\n")]
+    return [anvl_to_dict(a) for a in iter_anvl_records(anvls)]
 
 
 def anvl_to_dict(anvl):
@@ -34,13 +134,14 @@ def anvl_to_dict(anvl):
     dict
     """
     ark_dict = {}
-    for line in anvl.split("\n"):
+    for line in anvl.splitlines():
         if line.startswith("::"):
             ark_dict["ark"] = line[3:]
-        elif line.strip() != "":
-            # limit the split to only the first colon to not mangle URIs
-            k, v = line.split(":", 1)
-            ark_dict[k.strip()] = v.strip()
+        elif line and not line.startswith("#"):
+            # partition on only the first colon to not mangle URIs
+            k, sep, v = line.partition(":")
+            if sep:
+                ark_dict[k.strip()] = v.strip()
 
     return ark_dict
 
@@ -50,7 +151,9 @@ def batch_download(
     password,
     format_="anvl",
     compression="zip",
-    args=""
+    args="",
+    session=None,
+    decompress=False,
     ):
     """Batch download ARKs from EZID.
 
@@ -65,21 +168,36 @@ def batch_download(
         CSV requests require
     compression : str
         Valid inputs are 'gzip' or 'zip'. Defaults to 'zip'.
-    args : str
-        String to pass to EZID API. Strings should follow the
-        format '&key=value&key=value...'. A full list of parameters
-        can be found here:
-        https://ezid.cdlib.org/doc/apidoc.html#parameters
+    args : str, dict, or list of tuple
+        Additional parameters to pass to EZID API. Strings should
+        follow the format '&key=value&key=value...'; repeated keys,
+        such as CSV columns, may also be given as a list of
+        (key, value) tuples. A full list of parameters can be found
+        here: https://ezid.cdlib.org/doc/apidoc.html#parameters
+    session : requests.Session
+        Session to send requests with. Defaults to the shared
+        session from ``arkimedes.get_session()``.
+    decompress : bool
+        Save the unpacked download instead of the archive. 'gzip'
+        downloads are decompressed while they stream to disk; 'zip'
+        archives are extracted once saved. Defaults to False.
 
     Returns
     -------
     None
     """
+    if session is None:
+        session = get_session()
+
     url = "https://ezid.cdlib.org/download_request"
-    headers = {"Content-type": "application/x-www-form-urlencoded"}
-    query = f"format={format_}&compression={compression}{args}"
+    if isinstance(args, str):
+        args = parse_qsl(args.lstrip("&"))
+    elif isinstance(args, dict):
+        args = args.items()
+    # requests form-encodes the pairs and sets the Content-Type itself.
+    data = [("format", format_), ("compression", compression), *args]
 
-    r = requests.post(url, data=query, auth=(username, password), headers=headers)
+    r = session.post(url, data=data, auth=_basic_auth(username, password))
 
     if not r.ok or not r.text.startswith("success: "):
         print(f"Request failure!\n----------------\n{r.status_code}: {r.text}\n")
@@ -101,22 +219,48 @@ https://ezid.cdlib.org/doc/apidoc.html#download-formats
     print(f"Acquired download URL: {url}")
     print("It may take EZID a few minutes to prepare the file.")
     print("Waiting on EZID..", end="")
-    r = requests.get(url)
-    sleep_count = 0
-    # It up to 3 minutes for EZID to prepare a batch download.
-    # Check every 5 seconds for 5 minutes before giving up.
-    while sleep_count < 60:
+    # It can take EZID several minutes to prepare a batch download.
+    # Probe with HEAD, doubling the wait between checks up to a minute,
+    # and give up after five minutes.
+    delay = 2
+    deadline = monotonic() + 300
+    while True:
         print(".", end="", flush=True)
-        r = requests.get(url)
-        if r.status_code == 200:
-            with open(file_name, "wb") as fh:
-                fh.write(r.content)
+        status = session.head(url, allow_redirects=True).status_code
+        remaining = deadline - monotonic()
+        if status == 200 or remaining <= 0:
             break
 
-        sleep(5)
-        sleep_count += 1
-
-    if r.status_code == 200:
+        sleep(min(delay, remaining))
+        delay = min(delay * 2, 60)
+
+    gunzip = decompress and compression == "gzip"
+    if gunzip and file_name.endswith(".gz"):
+        file_name = file_name[:-3]
+
+    if status == 200:
+        with session.get(url, stream=True) as r:
+            status = r.status_code
+            if status == 200:
+                # Write the archive as it arrives rather than holding
+                # the whole download in memory.
+                with open(file_name, "wb") as fh:
+                    if gunzip:
+                        r.raw.decode_content = True
+                        with gzip.GzipFile(fileobj=r.raw) as gz:
+                            copyfileobj(gz, fh, CHUNK_SIZE)
+                    else:
+                        for chunk in r.iter_content(CHUNK_SIZE):
+                            fh.write(chunk)
+
+    if status == 200 and decompress and compression == "zip":
+        # Zip archives need random access, so unpack after saving.
+        with zipfile.ZipFile(file_name) as zf:
+            names = zf.namelist()
+            zf.extractall()
+        os.remove(file_name)
+        print("\n".join(names))
+    elif status == 200:
         print(file_name)
     else:
         print(f"Download failed.\nTry downloading manually from: {url}")
@@ -131,32 +275,53 @@ def build_anvl(
     type_="Collection",
     profile="dc",
 ):
-    return cleandoc(
-        f"""erc.who:{creator}
-            erc.what:{title}
-            erc.when:{dates}
-            dc.creator:{creator}
-            dc.title:{title}
-            dc.publisher:{publisher}
-            dc.date:{dates}
-            dc.type:{type_}
-            _target:{target}
-            _profile:{profile}
-            """
+    return _ANVL_TEMPLATE.format(
+        creator=creator,
+        title=title,
+        dates=dates,
+        target=target,
+        publisher=publisher,
+        type_=type_,
+        profile=profile,
     )
 
 
 def convert_anvl_file_to_tsv(anvl_file, tsv_file):
-    with open(tsv_file, "w", encoding="utf-8") as fh:
-        anvls = load_anvl_as_dict(anvl_file)
-        for anvl in anvls:
-            fh.write("\t".join(anvl.values()))
-            fh.write("\n")
+    """Convert an ANVL file to a TSV with one column per ANVL field.
+
+    Parameters
+    ----------
+    anvl_file : str or pathlib.Path
+        File to load ARK records from.
+    tsv_file : str or pathlib.Path
+        File to write the TSV to. Fields missing from a record are
+        left empty, and tabs or line breaks in a value become spaces.
+
+    Returns
+    -------
+    None
+    """
+    # Read the file twice rather than holding every record: once for the
+    # header columns, in the order fields are first seen, then for rows.
+    fields = {}
+    for anvl in load_anvl_as_dict(anvl_file):
+        fields.update(dict.fromkeys(anvl))
+    fields = list(fields)
+
+    with open(tsv_file, "w", encoding="utf-8", newline="") as fh:
+        writer = csv.writer(fh, lineterminator="\n", **_TSV_FORMAT)
+        writer.writerow(fields)
+        writer.writerows(
+            [anvl.get(f, "").translate(_TSV_UNSAFE) for f in fields]
+            for anvl in load_anvl_as_dict(anvl_file)
+        )
 
 
 def find_reusable(username, password):
     results = query(title="reuse", username=username, password=password)
-    return results
+    # EZID's title search matches "reuse" anywhere in a title, so keep
+    # only records whose whole title marks them as reusable.
+    return (r for r in results if _REUSE_TITLE_PATTERN.match(r["title"]))
 
 
 def find_url(url, username, password):
@@ -164,24 +329,105 @@ def find_url(url, username, password):
     return results
 
 
-def generate_anvl_strings(data_source, parser, output_file):
-    anvls = []
+def generate_anvl_strings(data_source, parser, output_file, executor=None):
+    if executor is None:
+        parsed = iter_anvl_strings(data_source, parser)
+    else:
+        # Parse in the executor's workers; output is still written here.
+        parsed = executor.map(parser, data_source)
 
-    for d in data_source:
-        anvls.append(parser(d))
+    if output_file is None:
+        return list(parsed)
 
-    if output_file is not None:
-        with open(output_file, "w", encoding="utf-8") as fh:
-            for a in anvls:
-                fh.write(f"{a}\n")
+    # Write each record as soon as it is parsed instead of in a second
+    # pass over the finished list.
+    anvls = []
+    with open(output_file, "w", encoding="utf-8") as fh:
+        for a in parsed:
+            anvls.append(a)
+            fh.write(f"{a}\n")
 
     return anvls
 
 
+def iter_anvl_records(anvls):
+    """Lazily split a multi-record ANVL string into its records.
+
+    Parameters
+    ----------
+    anvls : str
+        An ANVL-formatted string with records separated by blank lines.
+
+    Returns
+    -------
+    generator
+        Yields each non-empty record as a string.
+    """
+    start = 0
+    for match in _ANVL_RECORD_SEPARATOR.finditer(anvls):
+        record = anvls[start : match.start()].strip()
+        if record:
+            yield record
+        start = match.end()
+
+    record = anvls[start:].strip()
+    if record:
+        yield record
+
+
+def iter_anvl_strings(data_source, parser):
+    """Lazily parse each item in data_source into an ANVL string.
+
+    Parameters
+    ----------
+    data_source : iterable
+        Items to pass to `parser`.
+    parser : callable
+        Function that converts one item into an ANVL string.
+
+    Returns
+    -------
+    generator
+        Yields one ANVL string per item in `data_source`.
+    """
+    for d in data_source:
+        yield parser(d)
+
+
 def get_value_from_anvl_string(field, anvl):
-    anvl_dict = anvl_to_dict(anvl)
+    # The ARK comes from the '::' line, which only anvl_to_dict handles.
+    if field == "ark":
+        return anvl_to_dict(anvl).get(field)
+
+    pattern = _ANVL_FIELD_PATTERNS.get(field)
+    if pattern is None:
+        pattern = re.compile(rf"^[ \t]*{re.escape(field)}[ \t]*:(.*)$", re.M)
+        _ANVL_FIELD_PATTERNS[field] = pattern
+
+    # As with anvl_to_dict, a repeated field keeps its last value.
+    values = pattern.findall(anvl)
+
+    return values[-1].strip() if values else None
+
+
+def get_values_from_anvl_string(fields, anvl):
+    """Get several fields from an ANVL record, parsing it only once.
+
+    Parameters
+    ----------
+    fields : iterable of str
+        Names of the fields to retrieve, e.g. "_target" or "ark".
+    anvl : str
+        A single ANVL record.
 
-    return anvl_dict.get(field)
+    Returns
+    -------
+    tuple
+        The value of each field, in the order given, or None for
+        fields missing from the record.
+    """
+    anvl_dict = anvl_to_dict(anvl)
+    return tuple(anvl_dict.get(field) for field in fields)
 
 
 def load_anvl_as_dict(anvl_file):
@@ -198,21 +444,12 @@ def load_anvl_as_dict(anvl_file):
         Yields a dictionary where each key, value pair corresponds to an
         ANVL record field.
     """
-    ark_dict = {}
-    with open(anvl_file, "r", encoding="utf-8") as fh:
-        for line in fh:
-            line = line.strip()
-            if line == "":
-                yield ark_dict
-            elif line.startswith("::"):
-                ark_dict["ark"] = line[3:]
-            else:
-                k, v = line.split(":", 1)
-                ark_dict[k] = v.strip()
+    for anvl in load_anvl_as_str(anvl_file):
+        yield anvl_to_dict(anvl)
 
 
 def load_anvl_as_str(anvl_file):
-    """Returns a list of ARK records as ANVL strings.
+    """Creates a generator that yields ARK records as ANVL strings.
 
     Parameters
     ----------
@@ -221,12 +458,47 @@ def load_anvl_as_str(anvl_file):
 
     Returns
     -------
-    list
-        List of ARK records as a string.
+    generator
+        Yields an ARK record as a string.
     """
-
+    record = []
     with open(anvl_file, "r", encoding="utf-8") as fh:
-        return list(fh.read().split("\n\n"))
+        for line in fh:
+            line = line.rstrip("\r\n")
+            if line.strip():
+                record.append(line)
+            elif record:
+                yield "\n".join(record)
+                record.clear()
+
+    if record:
+        yield "\n".join(record)
+
+
+def _iter_tsv_metadata(tsv_file):
+    """Yield the build_anvl() arguments for each row of a TSV."""
+    with open(tsv_file, "r", encoding="utf-8", newline="") as fh:
+        # csv reads the file a row at a time; quoting is off so values,
+        # quotes and all, are taken exactly as written.
+        reader = csv.DictReader(fh, **_TSV_FORMAT)
+        for md in reader:
+            # DictReader pads short rows with None and gathers extra
+            # fields under a None key; neither lines up with the header.
+            if None in md or None in md.values():
+                raise ValueError(
+                    f"{tsv_file}, line {reader.line_num}: expected "
+                    f"{len(reader.fieldnames)} tab-separated fields"
+                )
+
+            yield {
+                "creator": md["dc.creator"],
+                "title": md["dc.title"],
+                "dates": md["dc.date"],
+                "target": md["_target"],
+                "publisher": md.get("dc.publisher") or "Iowa State University Library",
+                "type_": md["dc.type"],
+                "profile": "dc",
+            }
 
 
 def load_anvl_as_str_from_tsv(tsv_file):
@@ -245,23 +517,8 @@ def load_anvl_as_str_from_tsv(tsv_file):
     generator
         Yields an ANVL record as a string.
     """
-    with open(tsv_file, "r", encoding="utf-8") as fh:
-        keys = fh.readline().strip().split("\t")
-        for line in fh:
-            values = line.strip("\r\n").split("\t")
-            md = dict(zip(keys, values))
-            if "dc.publisher" not in md.keys():
-                md["dc.publisher"] = "Iowa State University Library"
-            anvl = build_anvl(
-                md["dc.creator"],
-                md["dc.title"],
-                md["dc.date"],
-                md["_target"],
-                md["dc.publisher"],
-                type_=md["dc.type"]
-            )
-
-            yield anvl
+    for md in _iter_tsv_metadata(tsv_file):
+        yield build_anvl(**md)
 
 
 def load_anvl_as_dict_from_tsv(tsv_file):
@@ -280,8 +537,10 @@ def load_anvl_as_dict_from_tsv(tsv_file):
     generator
         Yields an ANVL record as a dictionary.
     """
-    for anvl in load_anvl_as_str_from_tsv(tsv_file):
-        yield anvl_to_dict(anvl)
+    # Build the dict straight from the row rather than formatting an
+    # ANVL string and parsing it back.
+    for md in _iter_tsv_metadata(tsv_file):
+        yield {field: md[arg].strip() for field, arg in _ANVL_FIELDS}
 
 
 def login(username, password):
@@ -297,13 +556,23 @@ def login(username, password):
     requests.Session() object
     """
     s = requests.Session()
-    # Need to spoof the User-Agent to avoid getting a 405 error
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0"}
+    # Share the pooled connections of the main session; only the login
+    # cookie needs to live on this one.
+    s.mount("https://", get_session().get_adapter("https://"))
+    # Need to spoof the User-Agent to avoid getting a 405 error. Set it
+    # on the session so every later search sends it too.
+    s.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0"
     payload = {"next": "/", "username": username, "password": password,}
-    s.post("https://ezid.cdlib.org/login", data=payload, headers=headers)
+    s.post(_LOGIN_URL, data=payload)
     return s
 
 
+@lru_cache(maxsize=4)
+def _logged_in_session(username, password):
+    # Searches in a batch share one login rather than each logging in.
+    return login(username, password)
+
+
 def query(
         *,
         ps=1000,
@@ -439,83 +708,170 @@ def query(
         "update_time_to": update_time_to,
         "id_status": id_status,
     }
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0"}
-
-    s = login(username, password)
-    r = s.get(url, params=query, headers=headers)
-    tree = etree.HTML(r.text)
-    titles = tree.xpath("//td[@class='c_title']/a/text()")
-    creators = tree.xpath("//td[@class='c_creator']/a/text()")
-    identifiers = tree.xpath("//td[@class='c_identifier']/a/text()")
-    owners = tree.xpath("//td[@class='c_owner']/a/text()")
-    create_times = tree.xpath("//td[@class='c_create_time']/a/text()")
-    update_times = tree.xpath("//td[@class='c_update_time']/a/text()")
-    id_statuses = tree.xpath("//td[@class='c_id_status']/a/text()")
 
+    s = _logged_in_session(username, password)
+    r = s.get(url, params=query)
+    # An expired login is redirected to the login page; log in again once.
+    if r.url.startswith(_LOGIN_URL):
+        _logged_in_session.cache_clear()
+        s = _logged_in_session(username, password)
+        r = s.get(url, params=query)
+    # Parse the raw bytes, skipping a decode/re-encode round trip.
+    tree = etree.fromstring(r.content, _HTML_PARSER)
+
+    # Walk the result table once, reading every column from each row.
     results = (
-        dict(
-            zip(
-                (
-                    "creator",
-                    "title",
-                    "ark",
-                    "owner",
-                    "created",
-                    "updated",
-                    "id_status"
-                ),
-                row
-            )
-        )
-        for row
-        in zip_longest(
-            creators,
-            titles,
-            identifiers,
-            owners,
-            create_times,
-            update_times,
-            id_statuses,
-            fillvalue=""
-        )
+        {
+            key: row.findtext(f"td[@class='{column}']/a", "")
+            for key, column in _QUERY_COLUMNS
+        }
+        for row in _QUERY_ROWS_XPATH(tree)
     )
 
     return results
 
 
 def upload_anvl(
-    username, password, shoulder, anvl_text, action="mint", output_file=None
+    username,
+    password,
+    shoulder,
+    anvl_text,
+    action="mint",
+    output_file=None,
+    session=None,
+    print_=True,
 ):
+    if session is None:
+        session = get_session()
+
     base_url = "https://ezid.cdlib.org"
-    headers = {"Content-Type": "text/plain; charset=UTF-8"}
 
     if action == "mint":
         request_url = "/".join([base_url, "shoulder", shoulder])
     elif action == "update":
         request_url = "/".join([base_url, "id", shoulder])
 
-    r = requests.post(
-        request_url, headers=headers, data=anvl_text.encode("utf-8"), auth=(username, password)
-    )
+    # The session retries failed connections, which never reached EZID.
+    # A POST that may have been received is not re-sent, since a second
+    # mint would create a duplicate ARK, so log the record to resubmit.
+    try:
+        r = session.post(
+            request_url,
+            headers=_UPLOAD_HEADERS,
+            data=anvl_text.encode("utf-8"),
+            auth=_basic_auth(username, password),
+        )
+    except requests.RequestException as e:
+        logger.error("Upload to %s failed: %s\n%s", request_url, e, anvl_text)
+        return None
+
     ark = r.text[9:]
 
-    print(anvl_text)
-    print(r.text)
+    # Record and response go out as one message so that concurrent
+    # uploads can't interleave them.
+    log = logger.info if print_ else logger.debug
+    log("%s\n%s", anvl_text, r.text)
 
     if output_file is not None:
-        with open(output_file, "a", encoding="utf-8") as fh:
-            fh.write(f":: {ark}\n")
-            fh.write(f"{anvl_text.strip()}\n")
+        record = f":: {ark}\n{anvl_text.strip()}\n"
+        with _OUTPUT_LOCK, open(output_file, "a", encoding="utf-8") as fh:
+            fh.write(record)
 
     return ark
 
 
-def view_anvl(username, password, ark, print_=True):
+def upload_anvls(
+    username,
+    password,
+    shoulder,
+    anvls,
+    action="mint",
+    output_file=None,
+    max_workers=8,
+    session=None,
+):
+    """Upload several ANVL records to EZID concurrently.
+
+    Parameters
+    ----------
+    username : str
+        EZID username.
+    password : str
+        EZID password.
+    shoulder : str
+        ARK shoulder to mint under, or the ARK to update.
+    anvls : iterable of str
+        ANVL records to upload.
+    action : str
+        Either 'mint' or 'update'. Defaults to 'mint'.
+    output_file : str or pathlib.Path
+        File to append each uploaded record to. Defaults to None.
+    max_workers : int
+        Maximum number of requests in flight at once. Defaults to 8.
+    session : requests.Session
+        Session to send requests with. Defaults to the shared
+        session from ``arkimedes.get_session()``.
+
+    Returns
+    -------
+    list
+        The ARK returned by EZID for each record, in input order.
+    """
+    anvls = list(anvls)
+    if not anvls:
+        return []
+
+    def upload(anvl):
+        return upload_anvl(
+            username, password, shoulder, anvl, action, output_file, session, False
+        )
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(anvls))) as executor:
+        return list(executor.map(upload, anvls))
+
+
+def view_anvl(username, password, ark, print_=True, session=None):
+    if session is None:
+        session = get_session()
+
     base_url = "https://ezid.cdlib.org/id"
     request_url = "/".join([base_url, ark])
-    r = requests.get(request_url, auth=(username, password))
+    r = session.get(request_url, auth=_basic_auth(username, password))
 
     if print_:
         print(r.text)
 
     return r.text
+
+
+def view_anvls(username, password, arks, max_workers=16, session=None):
+    """Retrieve several ARK records from EZID concurrently.
+
+    Parameters
+    ----------
+    username : str
+        EZID username.
+    password : str
+        EZID password.
+    arks : iterable of str
+        ARKs to retrieve.
+    max_workers : int
+        Maximum number of requests in flight at once. Defaults to 16.
+    session : requests.Session
+        Session to send requests with. Defaults to the shared
+        session from ``arkimedes.get_session()``.
+
+    Returns
+    -------
+    dict
+        Maps each ARK to its record as returned by EZID.
+    """
+    arks = list(arks)
+    if not arks:
+        return {}
+
+    def view(ark):
+        return view_anvl(username, password, ark, False, session)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(arks))) as executor:
+        return dict(zip(arks, executor.map(view, arks)))
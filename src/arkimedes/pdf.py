@@ -1,44 +1,40 @@
-from io import BytesIO, StringIO
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
 import re
 
-from PyPDF2 import PdfFileReader
+from PyPDF2 import PdfReader
 
-from arkimedes import convert_date_string_to_iso
+from arkimedes import convert_date_string_to_iso, init_worker_session
 from arkimedes.ezid import build_anvl, generate_anvl_strings
 from arkimedes.qa import check_lc_naf
 
+# Each pattern captures the text between a report label and the next one.
+_CREATOR_P = re.compile(r"Conservator(.*?)Call Number")
+_TITLE_P = re.compile(r"Title:(.*?)\w+/?\w+:")
+_DATE_P = re.compile(r"Date of report:(.*?)Conservator")
+# Deletion table for dropping the line breaks PyPDF2 leaves in page text.
+_NEWLINES = str.maketrans("", "", "\n")
 
-def _generate_anvl_from_conservation_report(pdf_data):
-    pdf, pdf_url = pdf_data
-    pdf_content = StringIO()
 
-    reader = PdfFileReader(BytesIO(pdf))
+def _find_field(pattern, text):
+    match = pattern.search(text)
+    if match is None:
+        raise ValueError(f"Conservation report does not match {pattern.pattern!r}")
 
-    for page in reader.pages:
-        pdf_content.write(page.extractText())
+    return match[1]
 
-    text = pdf_content.getvalue().replace("\n", "")
 
-    creator_start_index = text.index("Conservator")
-    creator_end_index = text.index("Call Number")
-    
-    creator = check_lc_naf(
-        text[creator_start_index:creator_end_index].split(":")[1].strip()
-    )
+def _generate_anvl_from_conservation_report(pdf_data):
+    pdf, pdf_url = pdf_data
+    reader = PdfReader(BytesIO(pdf))
 
-    title_start_p = re.compile(r"Title:")
-    title_start_index = title_start_p.search(text).end()
-    title_end_p = re.compile(r"\w+/?\w+:")
-    title_end_index = title_end_p.search(text[title_start_index:]).start() + title_start_index
+    text = "".join(page.extract_text() for page in reader.pages)
+    text = text.translate(_NEWLINES)
 
-    title = text[title_start_index:title_end_index].strip()
+    creator = check_lc_naf(_find_field(_CREATOR_P, text).split(":")[1].strip())
+    title = _find_field(_TITLE_P, text).strip()
+    date = _find_field(_DATE_P, text).strip()
 
-    date_start_p = re.compile("Date of report:")
-    date_start_index = date_start_p.search(text).end()
-    date_end_p = re.compile("Conservator")
-    date_end_index = date_end_p.search(text[date_start_index:]).start() + date_start_index
-    date = text[date_start_index:date_end_index].strip()
-    
     if date != "":
         date = convert_date_string_to_iso(date)
 
@@ -46,6 +42,16 @@ def _generate_anvl_from_conservation_report(pdf_data):
 
 
 def generate_anvl_from_conservation_reports(pdf_data, output_file=None):
-    return generate_anvl_strings(
-        pdf_data, _generate_anvl_from_conservation_report, output_file
-    )
+    pdf_data = list(pdf_data)
+
+    if len(pdf_data) < 2:
+        return generate_anvl_strings(
+            pdf_data, _generate_anvl_from_conservation_report, output_file
+        )
+
+    # Text extraction is CPU-bound, so spread the PDFs across processes.
+    # Each worker builds its own session; see init_worker_session().
+    with ProcessPoolExecutor(initializer=init_worker_session) as executor:
+        return generate_anvl_strings(
+            pdf_data, _generate_anvl_from_conservation_report, output_file, executor
+        )
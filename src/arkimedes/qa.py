@@ -1,36 +1,46 @@
+from functools import lru_cache
 from urllib.parse import quote_plus
 
-from fuzzywuzzy import fuzz
-from lxml import etree, html
-import requests
+from lxml import etree
+from rapidfuzz import fuzz
+
+from arkimedes import get_session
+
+_HTML_PARSER = etree.HTMLParser(collect_ids=False, remove_comments=True)
+# The linked record name in each search result, found in one tree walk.
+_RESULT_NAMES_XPATH = etree.XPath(
+    "//tbody[@class='tbody-group']/tr/td/a[@title='Click to view record']"
+)
 
 
 def check_lc_naf(name):
+    return _lc_naf_lookup(name.strip())
+
+
+# Creators recur across a batch; look each one up only once per run.
+@lru_cache(maxsize=8192)
+def _lc_naf_lookup(name):
     return_name = name
     request_string = f"http://id.loc.gov/search/?q={quote_plus(name)}&q=cs%3ahttp%3a%2f%2fid.loc.gov%2fauthorities%2fnames"
-    request = requests.get(request_string)
+    # Reuse the pooled keep-alive connection to id.loc.gov.
+    request = get_session().get(request_string, timeout=30)
 
     if request.ok:
         # collect results from page (let's assume that results on additional
         # pages can't possibly be useful)
-        results_xpath = "//tbody[@class='tbody-group']"
-        name_xpath = "tr/td/a[@title='Click to view record']"
         matches = []
 
         min_threshold = 60
         threshold = 70
 
-        results_page = html.fromstring(request.text)
-
-        results = results_page.xpath(results_xpath)
+        results_page = etree.fromstring(request.content, _HTML_PARSER)
 
-        # see if there are any results
-        if results:
-            for result in results:
-                result_name = result.xpath(name_xpath)[0].text
-                ratio = fuzz.ratio(name, result_name)
-                if ratio > min_threshold:
-                    matches.append((ratio, name, result_name))
+        for result in _RESULT_NAMES_XPATH(results_page):
+            result_name = result.text or ""
+            # Round to the whole-number scores the thresholds were set for.
+            ratio = round(fuzz.ratio(name, result_name))
+            if ratio > min_threshold:
+                matches.append((ratio, name, result_name))
 
         if len(matches) > 1:
             matches.sort(reverse=True)
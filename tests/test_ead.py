@@ -0,0 +1,51 @@
+import unittest
+from unittest import mock
+
+from lxml import etree
+
+from arkimedes import ead
+
+EAD = b"""<?xml version="1.0" encoding="UTF-8"?>
+<ead xmlns="urn:isbn:1-931666-22-9">
+  <eadheader><eadid>https://example.org/ead/1</eadid></eadheader>
+  <archdesc level="collection">
+    <did>
+      <unittitle>%s</unittitle>
+      <unitdate normal="1900/1950">1900-1950</unitdate>
+    </did>
+    <dsc><c01><did><unittitle>Box 1</unittitle></did></c01></dsc>
+  </archdesc>
+</ead>
+"""
+
+
+class FindEadFieldsTest(unittest.TestCase):
+    def test_well_formed(self):
+        target, did = ead._find_ead_fields(EAD % b"Library records")
+
+        self.assertEqual(target, "https://example.org/ead/1")
+        self.assertEqual(ead._TITLE_XPATH(did), ["Library records"])
+
+    def test_undefined_entity_in_title_raises(self):
+        with self.assertRaises(etree.XMLSyntaxError):
+            ead._find_ead_fields(EAD % b"T &amp; &undefined; x")
+
+    def test_malformed_markup_after_did_raises(self):
+        xml = (EAD % b"Library records").replace(b"</c01>", b"</c02>")
+
+        with self.assertRaises(etree.XMLSyntaxError):
+            ead._find_ead_fields(xml)
+
+
+class GenerateAnvlFromEadXmlTest(unittest.TestCase):
+    def test_undefined_entity_is_logged_not_minted(self):
+        xml = EAD % b"T &amp; &undefined; x"
+
+        with mock.patch.object(ead, "_log_malformed_xml") as log:
+            self.assertIsNone(ead._generate_anvl_from_ead_xml(xml))
+
+        log.assert_called_once_with(xml)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from arkimedes import ezid
+
+HEADER = "dc.creator\tdc.title\tdc.date\t_target\tdc.type\n"
+
+
+class LoadAnvlFromTsvTest(unittest.TestCase):
+    def write_tsv(self, text):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        tsv_file = Path(tmp.name, "records.tsv")
+        tsv_file.write_text(text, encoding="utf-8")
+
+        return tsv_file
+
+    def test_values_are_read_as_written(self):
+        tsv_file = self.write_tsv(
+            HEADER + 'Smith\t"Moby" and others\t1900\thttps://example.org/1\tText\n'
+        )
+
+        (record,) = ezid.load_anvl_as_dict_from_tsv(tsv_file)
+
+        self.assertEqual(record["dc.title"], '"Moby" and others')
+        self.assertEqual(record["dc.publisher"], "Iowa State University Library")
+
+    def test_short_row_is_rejected(self):
+        tsv_file = self.write_tsv(HEADER + "Smith\tTitle\t1900\n")
+
+        for load in (ezid.load_anvl_as_str_from_tsv, ezid.load_anvl_as_dict_from_tsv):
+            with self.subTest(load=load.__name__):
+                with self.assertRaisesRegex(ValueError, "line 2"):
+                    list(load(tsv_file))
+
+    def test_long_row_is_rejected(self):
+        tsv_file = self.write_tsv(
+            HEADER + "Smith\tTitle\t1900\thttps://example.org/1\tText\textra\n"
+        )
+
+        with self.assertRaisesRegex(ValueError, "line 2"):
+            list(ezid.load_anvl_as_str_from_tsv(tsv_file))
+
+    def test_empty_publisher_uses_default(self):
+        tsv_file = self.write_tsv(
+            "dc.creator\tdc.title\tdc.date\t_target\tdc.type\tdc.publisher\n"
+            "Smith\tTitle\t1900\thttps://example.org/1\tText\t\n"
+        )
+
+        (record,) = ezid.load_anvl_as_dict_from_tsv(tsv_file)
+
+        self.assertEqual(record["dc.publisher"], "Iowa State University Library")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import tempfile
+import unittest
+
+import arkimedes
+
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+
+def _worker_cache_state(_):
+    session = arkimedes.get_session()
+    # Reading the cache from several workers at once must not fail.
+    return session.settings.read_only, len(list(session.cache.responses.keys()))
+
+
+@unittest.skipIf(requests_cache is None, "requests-cache is not installed")
+class WorkerSessionTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(self.reset_cache)
+        arkimedes.enable_http_cache(Path(tmp.name, "cache"))
+
+    def reset_cache(self):
+        arkimedes._CACHED_SESSION = None
+        arkimedes.close_session()
+
+    def test_parent_session_writes_to_the_cache(self):
+        self.assertFalse(arkimedes.get_session().settings.read_only)
+
+    def test_workers_only_read_the_cache(self):
+        # Build the parent's session first so workers inherit it on fork.
+        arkimedes.get_session()
+
+        with ProcessPoolExecutor(
+            max_workers=4, initializer=arkimedes.init_worker_session
+        ) as executor:
+            states = list(executor.map(_worker_cache_state, range(16)))
+
+        self.assertEqual(set(states), {(True, 0)})
+        self.assertFalse(arkimedes.get_session().settings.read_only)
+
+
+if __name__ == "__main__":
+    unittest.main()
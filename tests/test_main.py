@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+import unittest
+from unittest import mock
+
+import requests
+
+from arkimedes import __main__ as cli
+
+ARGS = SimpleNamespace(
+    action="mint-anvl", reuse=False, username="user", password="pass"
+)
+
+
+@mock.patch.object(cli, "find_url", return_value=iter([]))
+@mock.patch.object(cli, "upload")
+class SubmitMdTest(unittest.TestCase):
+    def test_repeated_target_is_skipped(self, upload, find_url):
+        known_urls = set()
+        for anvl in ("_target:https://example.org/1", "_target:https://example.org/1"):
+            cli.submit_md(ARGS, anvl, known_urls=known_urls)
+
+        upload.assert_called_once()
+
+    def test_records_without_target_are_all_submitted(self, upload, find_url):
+        known_urls = set()
+        for anvl in ("dc.title:One", "dc.title:Two"):
+            cli.submit_md(ARGS, anvl, known_urls=known_urls)
+
+        self.assertEqual(upload.call_count, 2)
+
+
+class SubmitAllTest(unittest.TestCase):
+    def test_failed_lookup_does_not_stop_the_batch(self):
+        def find_url(url, username, password):
+            if url.endswith("/2"):
+                raise requests.ConnectionError("EZID unreachable")
+            return iter([])
+
+        anvls = [f"_target:https://example.org/{i}" for i in range(1, 4)]
+        with mock.patch.object(cli, "find_url", find_url), mock.patch.object(
+            cli, "upload"
+        ) as upload, self.assertLogs(cli.logger, "ERROR"):
+            cli.submit_all(ARGS, anvls)
+
+        self.assertEqual(upload.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()